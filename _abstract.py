@@ -1,25 +1,44 @@
 import requests
 from requests.adapters import HTTPAdapter
-from urllib.parse import urljoin, urlparse
+from urllib3.util.retry import Retry
 import pandas as pd
-import numpy as np
-import re
 import json
-import time
 import os
-from collections import deque
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from abc import ABC, abstractmethod
-from typing import List, Dict, Tuple, Union, Optional, Callable
+import time
+import threading
+from copy import deepcopy
+from concurrent.futures import ThreadPoolExecutor
+from abc import ABC
+from typing import List, Dict, Tuple, Union, Optional, Callable, Iterator
 from .utils.config import Config
-import datetime as dt
+from .utils.cache import FileCache
 import logging
 import sqlite3
 from pathlib import Path
-from copy import deepcopy
+try:
+    import orjson
+except ImportError: # optional, falls back to the stdlib json decoder
+    orjson = None
+try:
+    import ijson
+except ImportError: # optional, _stream_items falls back to _get_data
+    ijson = None
 
 LOGPATH = './FinancialModelingPrep/.log/'
 LOGFILE = os.path.join(LOGPATH, 'log.log')
+POOL_SIZE = 32 # enough connections for the multithreaded fan-out methods
+SQLITE_PRAGMAS = """
+PRAGMA journal_mode=WAL;
+PRAGMA synchronous=NORMAL;
+PRAGMA temp_store=MEMORY;
+PRAGMA cache_size=-65536;
+"""
+AVAILABLE_TICKERS_DIR = Path.home() / '.cache' / 'fmp'
+AVAILABLE_TICKERS_TTL = 24 * 3600
+RESPONSE_CACHE_SIZE = 1024 # bodies kept in memory for _get_data(cache=True)
+TTL_CACHE_SIZE = 1024 # responses kept in memory by _get_data_ttl
+SQLITE_MAX_VARIABLES = 32766 if sqlite3.sqlite_version_info >= (3, 32, 0) \
+    else 999 # max bound parameters per statement
 
 if not os.path.exists(LOGPATH):
     os.makedirs(LOGPATH)
@@ -30,7 +49,14 @@ logging.basicConfig(filename=LOGFILE,
 
 
 class AbstractAPI(ABC):
-    
+    _available_tickers = dict() # (mode, apikey) -> (expiry, symbol list)
+    _ttl_cache = dict() # (apikey, url, params) -> (expiry, response)
+    _response_cache = dict() # (url, params) -> body, least recently used first
+    _response_lock = threading.Lock()
+    _ttl_lock = threading.Lock()
+    _shared_session = None
+    _session_lock = threading.Lock()
+
     def _get_config(self, config: Union[str, Config, dict]):
         if isinstance(config, Path):
             config = config.as_posix()
@@ -59,28 +85,43 @@ class AbstractAPI(ABC):
         mode='statements'
         ) -> Union[List, pd.DataFrame]:
         """
-        Get the list of all available tickers.
+        Get the list of all available tickers. Cached for the process and on 
+        disk under AVAILABLE_TICKERS_DIR for AVAILABLE_TICKERS_TTL seconds
         """
         available_ticker_urls = {
         'statements': 'financial-statement-symbol-lists/',
         'market_data': 'available-trade/list/',
         'indices': 'symbol/available-indexes'
         }
-        url = available_ticker_urls.get(mode)
-        endpoint = urljoin(self._endpoint, url)
-        ls = self._get_data(endpoint)
-        assert isinstance(ls, list)
+        key = (mode, self.apikey)
+        expiry, ls = AbstractAPI._available_tickers.get(key, (0, None))
+        if expiry < time.time():
+            url, params = self._prepare_request(available_ticker_urls.get(mode))
+            disk_cache = FileCache(AVAILABLE_TICKERS_DIR, AVAILABLE_TICKERS_TTL)
+            content = disk_cache.get(url, params)
+            if content is not None:
+                ls = orjson.loads(content) if orjson else json.loads(content)
+            else:
+                ls = self._get_data(url, no_cache=True)
+                assert isinstance(ls, list)
+                disk_cache.set(url, params, orjson.dumps(ls) if orjson 
+                    else json.dumps(ls).encode('utf-8'))
+            AbstractAPI._available_tickers[key] = (
+                time.time() + AVAILABLE_TICKERS_TTL, ls)
         if isinstance(ls[0], str):
             return ls
         else:
-            new_ls = [pd.Series(i).to_frame().T for i in ls]
-            df = pd.concat(new_ls).T
-            return df
+            return pd.DataFrame(ls)
 
     def __init__(self, 
         config: Optional[Union[Config, str]]=None, 
         version: str='v3',
         sql_path: Optional[str]=None,
+        sql_backend: str='sqlite',
+        cache_path: Optional[str]=None,
+        cache_expire_after: int=3600,
+        cache_dir: Optional[str]=None,
+        cache_ttl: Optional[int]=None,
         ):
         """
         :param config: The config file to use. Takes str or Config object.
@@ -89,66 +130,324 @@ class AbstractAPI(ABC):
             v3 is free, v4 is premium.
         :param mode: The mode of the API to use. Takes 'statements', 'market_data'
             'index', and 'funds'
+        :param sql_backend: takes 'sqlite' or 'duckdb'. duckdb must be 
+            installed separately
+        :param cache_path: if specified, GET responses are cached in a sqlite 
+            file at this path. requests-cache must be installed separately
+        :param cache_expire_after: seconds before a response in cache_path 
+            expires
+        :param cache_dir: if specified, successful non-empty responses are 
+            also kept as json files under this directory. Falls back to 
+            "cache_dir" in the config
+        :param cache_ttl: seconds before a file in cache_dir is stale. Falls 
+            back to "cache_ttl" in the config, then 90 days
+
+        cache_dir is checked first, then cache_path below it at the http 
+        level. _get_data(cache=True) and _get_data_ttl add in-memory layers 
+        for single calls. _get_data(no_cache=True) skips all of them
         """
         self.config = self._get_config(config)
         self.__endpoint = 'https://financialmodelingprep.com/api/'
         self.__version = version
-        self._endpoint = urljoin(self.__endpoint, f"{self.__version}/")
+        self._endpoint = f"{self.__endpoint}{self.__version}/"
+        self._api_bases = {v: f"{self.__endpoint}{v}/" for v in ('v3', 'v4')}
         self.apikey = self.config.get('apikey', returntype='str')
         if not self.apikey:
             self.apikey = input("enter your apikey: ")
-        self.session = requests.Session()
+        if cache_path:
+            import requests_cache
+            self.session = self._mount_adapter(requests_cache.CachedSession(
+                cache_path, backend='sqlite', expire_after=cache_expire_after))
+        else:
+            self.session = self._get_shared_session()
+        cache_dir = cache_dir or self.config.get('cache_dir', returntype='str')
+        cache_ttl = cache_ttl or self.config.get('cache_ttl', returntype='int',
+            default=90 * 24 * 3600)
+        self._file_cache = FileCache(cache_dir, cache_ttl) if cache_dir \
+            else None
         self._default_headers = dict()
         self._default_params = dict(apikey=self.apikey)
-        self.session.mount('https://', HTTPAdapter(max_retries=3))
-        self.sql_conn = sqlite3.connect(sql_path) if sql_path else None
+        self.sql_backend = sql_backend
+        if not sql_path:
+            self.sql_conn = None
+        elif sql_backend == 'sqlite':
+            self.sql_conn = sqlite3.connect(sql_path)
+            self.sql_conn.executescript(SQLITE_PRAGMAS)
+        elif sql_backend == 'duckdb':
+            import duckdb
+            self.sql_conn = duckdb.connect(sql_path)
+        else:
+            raise NotImplementedError("sql_backend must be 'sqlite' or 'duckdb'")
         self._cur = self.sql_conn.cursor() if self.sql_conn else None
     
+    @staticmethod
+    def _mount_adapter(session: requests.Session) -> requests.Session:
+        """mounts the pooled, retrying adapter used for every request"""
+        retries = Retry(total=3, backoff_factor=0.2, 
+            status_forcelist=[429, 500, 502, 503, 504], raise_on_status=False)
+        session.mount('https://', HTTPAdapter(max_retries=retries,
+            pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE))
+        return session
+
+    @classmethod
+    def _get_shared_session(cls) -> requests.Session:
+        """one session for all instances in the process, so short lived 
+        instances such as the classmethod entry points reuse open connections 
+        instead of doing a new TCP and TLS handshake each"""
+        with AbstractAPI._session_lock:
+            if AbstractAPI._shared_session is None:
+                AbstractAPI._shared_session = cls._mount_adapter(
+                    requests.Session())
+            return AbstractAPI._shared_session
+
     def _get_data(self, url: str, 
         ticker: Optional[str]=None, 
         additional_params: Optional[Dict]=None,
         ignore_error: bool=True, 
+        cache: bool=False,
+        no_cache: bool=False,
+        api_version: Optional[str]=None,
         **kwargs, ) -> Union[List, Dict]:
         """
-        :param url: The url to get data from. Do not include the root endpoint
+        :param url: The url to get data from. Do not include the root endpoint.
+            Absolute urls are used as they are
+        :param cache: reuse the body of an identical earlier request, kept in 
+            memory for all instances. Only for idempotent endpoints
+        :param no_cache: bypass every cache (cache_dir, cache_path, `cache` 
+            and _get_data_ttl), e.g. for data of the current quarter which 
+            may still change
+        :param api_version: e.g. 'v4' to query another version of the API 
+            than the instance's, without changing the instance's endpoint
+        """
+        url, params = self._prepare_request(url, ticker, additional_params, 
+            api_version=api_version, **kwargs)
+        file_cache = None if no_cache else self._file_cache
+        content = file_cache.get(url, params) if file_cache else None
+        hit = content is not None
+        if not hit:
+            if cache and not no_cache:
+                content = self._get_data_cached(url, frozenset(params.items()))
+            else: # the shared session never goes through requests-cache
+                session = self._get_shared_session() if no_cache \
+                    else self.session
+                res = session.get(url, params=params)
+                content = res.content \
+                    if res.status_code in [200, 202] else None
+            if content is None:
+                return
+        try:
+            data = orjson.loads(content) if orjson else json.loads(content)
+        except Exception as e:
+            logging.error(e)
+            if ignore_error:
+                return
+            else:
+                raise e
+        if file_cache and not hit and data and not (isinstance(data, dict) 
+            and 'Error Message' in data): # empty pages may fill up later
+            file_cache.set(url, params, content)
+        return data
+
+    def _get_data_ttl(self, url: str, ttl: Optional[int]=None, 
+        **kwargs) -> Union[List, Dict]:
+        """_get_data with a process wide in-memory cache, for responses that 
+        change at most daily. Callers get a copy of the cached response
+        :param ttl: seconds to keep the response. Defaults to "memory_cache_ttl" 
+            in the config, then 24 hours
         """
-        params = deepcopy(self._default_params)
-        if ticker: params.update(dict(symbol=ticker))
+        if kwargs.get('no_cache'):
+            return self._get_data(url, **kwargs)
+        ttl = ttl or self.config.get('memory_cache_ttl', returntype='int', 
+            default=24 * 3600)
+        key = (self.apikey, self._endpoint, url, frozenset(kwargs.items()))
+        with AbstractAPI._ttl_lock:
+            expiry, res = AbstractAPI._ttl_cache.get(key, (0, None))
+        if expiry < time.time():
+            res = self._get_data(url, **kwargs)
+            if res is None or (isinstance(res, dict) 
+                and 'Error Message' in res):
+                return res
+            now = time.time()
+            with AbstractAPI._ttl_lock:
+                cache = AbstractAPI._ttl_cache
+                for k in [k for k, (exp, _) in cache.items() if exp < now]:
+                    del cache[k]
+                cache[key] = (now + ttl, res)
+                while len(cache) > TTL_CACHE_SIZE:
+                    del cache[next(iter(cache))]
+        return deepcopy(res)
+
+    def _get_data_cached(self, url: str, 
+        params: frozenset) -> Optional[bytes]:
+        """raw response body, memoized on (url, params) for all instances, 
+        least recently used dropped first. The apikey is one of the params. 
+        Unsuccessful requests return None and are not cached"""
+        key = (url, params)
+        with AbstractAPI._response_lock:
+            content = AbstractAPI._response_cache.pop(key, None)
+            if content is not None: # move to the most recently used end
+                AbstractAPI._response_cache[key] = content
+                return content
+        res = self.session.get(url, params=dict(params))
+        if res.status_code not in [200, 202]:
+            return
+        with AbstractAPI._response_lock:
+            AbstractAPI._response_cache[key] = res.content
+            while len(AbstractAPI._response_cache) > RESPONSE_CACHE_SIZE:
+                del AbstractAPI._response_cache[
+                    next(iter(AbstractAPI._response_cache))]
+        return res.content
+
+    def _prepare_request(self, url: str, 
+        ticker: Optional[str]=None, 
+        additional_params: Optional[Dict]=None,
+        api_version: Optional[str]=None,
+        **kwargs) -> Tuple[str, Dict]:
+        """returns the full url and query parameters for a request"""
+        params = dict(self._default_params)
+        if ticker: params['symbol'] = ticker
         if additional_params: params.update(additional_params)
         params.update(kwargs)
-        url = urljoin(self._endpoint, url)
-        res = self.session.get(url, params=params)
-        if res.status_code in [200, 202]:
-            try:
-                return res.json()
-            except Exception as e:
-                logging.error(e)
-                if ignore_error:
-                    pass
-                else:
-                    raise e
+        if not url.startswith(('https://', 'http://')):
+            endpoint = (self._api_bases.get(api_version) 
+                or f"{self.__endpoint}{api_version}/") if api_version \
+                else self._endpoint
+            url = endpoint + url.lstrip('/')
+        return url, params
+
+    def _stream_items(self, url: str, prefix: str,
+        ticker: Optional[str]=None, 
+        additional_params: Optional[Dict]=None,
+        **kwargs) -> Optional[Iterator]:
+        """iterates over the elements of an array in the response without 
+        holding the whole body in memory. Goes through _get_data instead when 
+        ijson isn't installed or cache_dir is set, so the files are used
+        :param url: The url to get data from. Do not include the root endpoint
+        :param prefix: ijson prefix of the array items, e.g. 'historical.item'
+        :return: None if the request fails, as _get_data
+        """
+        if ijson is None or self._file_cache is not None:
+            data = self._get_data(url, ticker, additional_params, **kwargs)
+            if data is None:
+                return
+            for key in prefix.split('.')[:-1]:
+                data = data.get(key) if isinstance(data, dict) else None
+            return iter(data or [])
+        url, params = self._prepare_request(url, ticker, additional_params, 
+            **kwargs)
+        res = self.session.get(url, params=params, stream=True)
+        if res.status_code not in [200, 202]:
+            res.close()
+            return
+        res.raw.decode_content = True
+        def items() -> Iterator:
+            with res:
+                yield from ijson.items(res.raw, prefix, use_float=True)
+        return items()
 
     def pandas_to_sql(self, pandas_obj: Union[pd.Series, pd.DataFrame],
         table_name: str, **kwargs):
         """
         :param pandas_obj: The pandas object to save to sql.
         :param table_name: The name of the table to save to.
+        :param kwargs: passed to pd.DataFrame.to_sql. Rows are written with 
+            multi-row INSERTs, as many rows per statement as sqlite allows.
+            With the duckdb backend only `if_exists` and `index` are used
+        """
+        if self.sql_backend == 'duckdb':
+            return self._pandas_to_duckdb(pandas_obj, table_name, **kwargs)
+        ncols = pandas_obj.shape[1] if pandas_obj.ndim > 1 else 1
+        ncols += pandas_obj.index.nlevels if kwargs.get('index', True) else 0
+        kwargs.setdefault('method', 'multi')
+        kwargs.setdefault('chunksize', max(1, SQLITE_MAX_VARIABLES // ncols))
+        with self.sql_conn: # single transaction, commits once on exit
+            pandas_obj.to_sql(table_name, self.sql_conn, **kwargs)
+
+    def _pandas_to_duckdb(self, pandas_obj: Union[pd.Series, pd.DataFrame],
+        table_name: str, if_exists: str='fail', index: bool=True, **kwargs):
+        """writes the frame in one statement via duckdb's dataframe scan
+        :param if_exists: takes 'fail', 'replace' and 'append', as to_sql
         """
-        pandas_obj.to_sql(table_name, self.sql_conn, **kwargs)
-        self.sql_conn.commit()
+        df = pandas_obj.to_frame() if isinstance(pandas_obj, pd.Series) \
+            else pandas_obj
+        if index: df = df.reset_index()
+        self.sql_conn.register('pandas_obj', df)
+        try:
+            if if_exists == 'replace':
+                self.sql_conn.execute(
+                    f'CREATE OR REPLACE TABLE "{table_name}" AS SELECT * FROM pandas_obj')
+            elif if_exists == 'append':
+                self.sql_conn.execute(
+                    f'CREATE TABLE IF NOT EXISTS "{table_name}" AS SELECT * FROM pandas_obj LIMIT 0')
+                self.sql_conn.execute(
+                    f'INSERT INTO "{table_name}" SELECT * FROM pandas_obj')
+            elif if_exists == 'fail':
+                self.sql_conn.execute(
+                    f'CREATE TABLE "{table_name}" AS SELECT * FROM pandas_obj')
+            else:
+                raise ValueError("if_exists must be 'fail', 'replace' or 'append'")
+        finally:
+            self.sql_conn.unregister('pandas_obj')
+
+    @staticmethod
+    def _gather(func: Callable, args: List, max_workers: int=POOL_SIZE, 
+        **kwargs) -> List:
+        """run func over args on a single thread pool, keeping every request 
+        in flight at once up to max_workers
+        :param func: The function to call for each element of args.
+        :param args: The first positional argument of each call.
+        :param max_workers: Number of concurrent requests.
+        :return: results in the same order as args
+        """
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(func, arg, **kwargs) for arg in args]
+            return [future.result() for future in futures]
+
+    def _get_data_many(self, urls: List[str], max_workers: int=POOL_SIZE, 
+        **kwargs) -> List[Union[List, Dict]]:
+        """fetch several urls concurrently over the shared session
+        :param urls: urls to get data from. Do not include the root endpoint
+        :param max_workers: Number of concurrent requests.
+        :param kwargs: passed to `_get_data` for every url
+        :return: responses in the same order as urls
+        """
+        return self._gather(self._get_data, urls, max_workers=max_workers, 
+            **kwargs)
 
     @classmethod
-    def batch_download(cls, tickers: List[str], func: Callable, **kwargs):
+    def batch_download(cls, tickers: List[str], func: Callable, 
+        max_workers: int=POOL_SIZE, **kwargs):
         """
         :param func: The function to call for each ticker.
+        :param max_workers: Number of concurrent requests.
         :param kwargs: The keyword arguments to pass to the function.
         """
-        res = []
-        with ThreadPoolExecutor(max_workers=10) as executor:
-            futures = [executor.submit(func, ticker, **kwargs) 
-                for ticker in tickers]
-            res = [future.result() for future in as_completed(futures)]
-        return res
+        return cls._gather(func, tickers, max_workers=max_workers, **kwargs)
+
+    @classmethod
+    def clear_cache(cls):
+        """drops the in-memory caches shared by all instances and the 
+        available tickers lists kept on disk. Files under cache_dir are kept
+        """
+        AbstractAPI._available_tickers.clear()
+        AbstractAPI._ttl_cache.clear()
+        AbstractAPI._response_cache.clear()
+        FileCache(AVAILABLE_TICKERS_DIR).clear()
+
+    def close(self):
+        """closes the sql connection, and the http session unless it is the 
+        process wide one shared with other instances"""
+        if self.session is not AbstractAPI._shared_session:
+            self.session.close()
+        if self.sql_conn is not None:
+            self.sql_conn.close()
+            self.sql_conn, self._cur = None, None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
 
     @property
     def endpoint(self):
@@ -156,7 +455,8 @@ class AbstractAPI(ABC):
 
     @endpoint.setter
     def endpoint(self, newendpoint: str):
-        self._endpoint = newendpoint
+        self._endpoint = newendpoint if newendpoint.endswith('/') \
+            else f"{newendpoint}/"
 
     @property
     def default_headers(self):
@@ -1,9 +1,7 @@
 """generate data for downstream pipelines such as deep macro and NLP"""
 from __future__ import annotations
 import numpy as np
-from typing import (Union, Sequence, List, Iterator, Dict, Callable)
-import pandas as pd
-from abc import abstractclassmethod, abstractmethod, ABC
+from abc import abstractclassmethod, ABC
 from .tickers import Ticker
 from .forex import ForEx
 
@@ -26,7 +24,7 @@ class CompanyProfiles(abstract):
     @classmethod
     def download_data(cls):
         profiles = Ticker.get_all_company_profiles()
-        fx = ForEx.get_live_fx().T.price.to_dict()
+        fx = ForEx.get_live_fx().price.to_dict()
         profiles.loc[:, "currency_code"] = profiles.currency.apply(lambda x: f"{x}USD" if x not in ["2.4", np.nan] else np.nan)
         profiles.loc[:, "fx"] = profiles.currency_code.map(fx)
         return profiles
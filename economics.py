@@ -1,17 +1,12 @@
 from __future__ import annotations
-from urllib.parse import urljoin
-from copy import deepcopy
 import pandas as pd
-from typing import Optional, Union, List, Dict, Callable
-from collections import deque
+from typing import Optional, Union, Callable
 import os
-from concurrent.futures import ThreadPoolExecutor, as_completed
 import datetime as dt
 from argparse import ArgumentParser
 from pathlib import Path
 from ._abstract import AbstractAPI
 from .utils.config import Config
-from .utils.utils import pandas_strptime, iter_by_chunk
 import numpy as np
 import logging
 
@@ -53,58 +48,68 @@ if not sql_p.exists():
 
 class Economics(AbstractAPI):
 
+    all_fields = (
+        'GDP', 
+        'realGDP', 
+        'nominalPotentialGDP',
+        'realGDPPerCapita',
+        'federalFunds',
+        'CPI',
+        'inflationRate', 
+        'inflation',
+        'retailSales',
+        'consumerSentiment', 
+        'durableGoods', 
+        'unemploymentRate',
+        'totalNonfarmPayroll', 
+        'initialClaims',
+        'industrialProductionTotalIndex',
+        'newPrivatelyOwnedHousingUnitsStartedTotalUnits',
+        'totalVehicleSales',
+        'retailMoneyFunds', 'smoothedUSRecessionProbabilities', 
+        '3MonthOr90DayRatesAndYieldsCertificatesOfDeposit', 
+        'commercialBankInterestRateOnCreditCardPlansAllAccounts',
+        '30YearFixedRateMortgageAverage',
+        '15YearFixedRateMortgageAverage'
+    )
+
     def __init__(self, 
         config: Union[str, Config]=DEFAULT_CONFIG,
-        sql_path: Optional[str]=DEFAULT_SQL_PATH):
+        sql_path: Optional[str]=DEFAULT_SQL_PATH,
+        **kwargs):
         super(Economics, self).__init__(
             config=config,
             version='v4',
-            sql_path=sql_path)
-        self.all_fields = [
-            'GDP', 
-            'realGDP', 
-            'nominalPotentialGDP',
-            'realGDPPerCapita',
-            'federalFunds',
-            'CPI',
-            'inflationRate', 
-            'inflation',
-            'retailSales',
-            'consumerSentiment', 
-            'durableGoods', 
-            'unemploymentRate',
-            'totalNonfarmPayroll', 
-            'initialClaims',
-            'industrialProductionTotalIndex',
-            'newPrivatelyOwnedHousingUnitsStartedTotalUnits',
-            'totalVehicleSales',
-            'retailMoneyFunds', 'smoothedUSRecessionProbabilities', 
-            '3MonthOr90DayRatesAndYieldsCertificatesOfDeposit', 
-            'commercialBankInterestRateOnCreditCardPlansAllAccounts',
-            '30YearFixedRateMortgageAverage',
-            '15YearFixedRateMortgageAverage'
-        ]
+            sql_path=sql_path,
+            **kwargs)
+        self._econ_url = self._endpoint + 'economic'
 
     def __get_data(self, field: str,
         start_date: Union[str, dt.date],
-        end_date: Union[str, dt.date]):
+        end_date: Union[str, dt.date],
+        cache: bool=False):
         if isinstance(start_date, dt.date): start_date = start_date.strftime("%Y-%m-%d")
         if isinstance(end_date, dt.date): end_date = end_date.strftime("%Y-%m-%d")
-        return self._get_data(url="economic",
+        return self._get_data(url=self._econ_url,
             additional_params={'from': start_date,
                 'end': end_date},
+            cache=cache,
             name=field)
 
     def get_data(self, field: str,
         start_date: Union[str, dt.date]=DEFAULT_START_DATE,
         end_date: Union[str, dt.date]=TODAY,
         freq: Optional[str]=None,
-        aggfunc: Callable=np.mean):
-        data = self.__get_data(field, start_date, end_date)
+        aggfunc: Callable=np.mean,
+        cache: bool=False):
+        """
+        :param cache: reuse the response of an identical earlier request
+        """
+        data = self.__get_data(field, start_date, end_date, cache)
         data = pd.DataFrame(data, columns=['date', 'value'])
         data.columns = ['date', field]
-        data = pandas_strptime(data, 
-            index_name='date', axis=1)
+        data['date'] = pd.to_datetime(data['date'], format='%Y-%m-%d', 
+            cache=True)
         if freq:
             try:
                 data.date = data.date.dt.to_period(freq)
@@ -121,24 +126,19 @@ class Economics(AbstractAPI):
         max_workers: int=8,
         freq: str='M',
         to_sql: bool=False):
-        res = []
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            futures = [executor.submit(cls(DEFAULT_CONFIG).get_data, 
-                    field, start_date, end_date, freq=freq)
-                for field in cls(DEFAULT_CONFIG).all_fields]
-        for future in as_completed(futures):
-            data = future.result()
-            res.append(data)
+        inst = cls(DEFAULT_CONFIG)
+        res = inst._gather(inst.get_data, cls.all_fields, 
+            max_workers=max_workers, start_date=start_date, 
+            end_date=end_date, freq=freq)
         df = pd.concat(res)
         df = df.groupby(by='date').mean()
         if to_sql:
             export_df = df.copy(deep=True)
             export_df.index = export_df.index.astype(str)
-            cls(config=DEFAULT_CONFIG, sql_path=DEFAULT_SQL_PATH).\
-                pandas_to_sql(
-                    export_df, 
-                    table_name=f'economic_indicators_{start_date}-{end_date}_{freq}',
-                    if_exists='append')
+            inst.pandas_to_sql(
+                export_df, 
+                table_name=f'economic_indicators_{start_date}-{end_date}_{freq}',
+                if_exists='append')
         return df
 
 
@@ -1,19 +1,18 @@
 from __future__ import annotations
-from urllib.parse import urljoin
-from copy import deepcopy
-import re
 import pandas as pd
-from typing import (Optional, Union, List, Dict, Callable, Sequence)
-from collections import deque
-import warnings
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import (Optional, Union, List, Dict, Callable, Sequence, Iterable)
 import datetime as dt
-from argparse import ArgumentParser
 from pathlib import Path
-import math
+from functools import cached_property
+import numpy as np
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError: # optional, only needed for ForEx(use_arrow=True)
+    pa = None
 from ._abstract import AbstractAPI
 from .utils.config import Config
-from .utils.utils import pandas_strptime, iter_by_chunk
+from .utils.utils import iter_by_chunk
 
 
 DEFAULT_CONFIG = "./FinancialModelingPrep/.config/config.json"
@@ -29,6 +28,8 @@ CUR_YEAR = TODAY.year
 LAST_Q = (TODAY - dt.timedelta(days=90)).month // 3
 DEFAULT_START_DATE = dt.date(2020, 1, 1)
 MAX_INPUT_LEN = 5
+INTRADAY_FORMAT = "%Y-%m-%d %H:%M:%S"
+INT32 = np.iinfo(np.int32) # bounds for narrowing integer columns
 
 
 
@@ -45,27 +46,32 @@ class ForEx(AbstractAPI):
     def __get_available_pairs(self):
         res = self._get_data(url="symbol/available-forex-pairs")
         if isinstance(res, List):
-            print(res) # FIXME
-            df = pd.concat([pd.Series(d).to_frame().T for d in res]).T
+            df = pd.DataFrame.from_records(res).set_index("symbol")
             return df
         else: return res
 
     def __init__(self, 
         config: Union[str, Callable, Config]=DEFAULT_CONFIG,
+        use_arrow: bool=False,
         **kwargs):
-        super(ForEx, self).__init__(config=config)
+        """
+        :param use_arrow: build historical frames through pyarrow with 
+            pd.ArrowDtype columns. Requires pyarrow and pandas>=2.0
+        """
+        super(ForEx, self).__init__(config=config, **kwargs)
+        if use_arrow and pa is None:
+            raise ImportError("pyarrow must be installed to use `use_arrow`")
+        self.use_arrow = use_arrow
 
-    @property
+    @cached_property
     def available_tickers_(self):
-        """returns available tickers"""
-        self._available_tickers_ = self.__get_available_pairs()
-        return self._available_tickers_
+        """returns available tickers. Fetched once per instance"""
+        return self.__get_available_pairs()
 
     def _get_live_fx(self) -> Union[Dict, pd.DataFrame]:
         res = self._get_data(url="quotes/forex")
         if isinstance(res, List):
-            df = pd.concat([pd.Series(d).to_frame().T for d in res]).T
-            df = df.T.set_index("symbol").T
+            df = pd.DataFrame.from_records(res).set_index("symbol")
             return df
         else: return res
 
@@ -74,17 +80,64 @@ class ForEx(AbstractAPI):
         config: Union[str, Callable, Config]=DEFAULT_CONFIG) -> Union[Dict, pd.DataFrame]:
         return cls(config=config)._get_live_fx()
 
+    def __historical_frame(self, historical: Iterable[Dict], 
+        symbol: str, dtype: Optional[str]=None, 
+        date_format: str="%Y-%m-%d") -> pd.DataFrame:
+        """builds the bars of one symbol column by column, indexed by 
+        (symbol, date)
+        :param date_format: format of the date field, "%Y-%m-%d %H:%M:%S" 
+            for intraday bars
+        :param dtype: if specified, float columns are cast to it (e.g. 
+            'float32') and integer columns such as volume to int32 when 
+            their values fit, otherwise they stay int64
+        """
+        historical = list(historical or [])
+        if not historical: return pd.DataFrame()
+        if self.use_arrow:
+            table = pa.Table.from_pylist(historical)
+            if dtype:
+                target = pa.from_numpy_dtype(np.dtype(dtype))
+                def narrow(f):
+                    if pa.types.is_floating(f.type): return f.with_type(target)
+                    if pa.types.is_integer(f.type):
+                        bounds = pc.min_max(table[f.name]).as_py()
+                        if bounds['min'] is None or (INT32.min <= bounds['min'] 
+                            and bounds['max'] <= INT32.max):
+                            return f.with_type(pa.int32())
+                    return f
+                table = table.cast(pa.schema([narrow(f) 
+                    for f in table.schema]))
+            val = table.to_pandas(types_mapper=pd.ArrowDtype)
+        else:
+            val = pd.DataFrame({k: [d.get(k) for d in historical] 
+                for k in historical[0]})
+        val["date"] = pd.to_datetime(val["date"], format=date_format, 
+            cache=True)
+        if dtype and not self.use_arrow:
+            for c in val.select_dtypes(include="float").columns:
+                val[c] = val[c].astype(dtype)
+            for c in val.select_dtypes(include="integer").columns:
+                if val[c].between(INT32.min, INT32.max).all():
+                    val[c] = val[c].astype("int32")
+        val.index = pd.MultiIndex.from_product([[symbol], val["date"].to_numpy()],
+            names=["symbol", "date"])
+        return val
+
     def __get_historical_fx(self,
         ticker: Union[str, Sequence[str]],
-        freq: str="d") -> pd.DataFrame:
+        freq: str="d",
+        dtype: Optional[str]=None,
+        cache: bool=False) -> pd.DataFrame:
         """base method to get the historical fx rate
         :param ticker: takes list or str. must be in the `self.available_tickers_ ` list
         :param freq: takes the following arguments:
             - "d", "daily", "day" - daily frequency
             - "Xmin" for X in [1, 5, 15, 30]
             - "Xhour" for X in [1, 4]
+        :param dtype: narrower float dtype for the price columns, e.g. 'float32'
+        :param cache: reuse responses of identical earlier requests
         """
-        if isinstance(ticker, Sequence):
+        if not isinstance(ticker, str) and isinstance(ticker, Sequence):
             assert len(ticker) <= 5, "FMP does not accept sequences longer than 5 tickers!"
         chart_freqs = [f"{i}min" for i in (1, 5, 15, 30)] + \
             [f"{i}hour" for i in (1, 4)]
@@ -96,52 +149,43 @@ class ForEx(AbstractAPI):
             raise TypeError("`ticker` must be either string or sequence of string!")
 
         if freq in ["d", "daily", "day"]:
-            res = self._get_data(url=f"historical-price-full/{ticker_str}")
-            if isinstance(res, Dict):
-                if 'historicalStockList' in res.keys():
-                    ls = []
-                    for data in res.get("historicalStockList"):
-                        symbol = data.get("symbol")
-                        val = pd.concat((pd.Series(d).to_frame().T for d in data.get("historical")))
-                        val.index = pd.MultiIndex.from_tuples([(symbol, date) for date in val.date])
-                        ls.append(val)
-                    df = pd.concat(ls)
-                    return df
-                else:
-                    symbol = res.get("symbol")
-                    val = pd.concat((pd.Series(d).to_frame().T for d in res.get("historical")))
-                    val.index = pd.MultiIndex.from_tuples([(symbol, date) for date in val.date])
-                    df = val
-                    return df
-            else:
-                return res
+            if "," not in ticker_str and not cache: # single symbol - parse the bars as they arrive
+                items = self._stream_items(
+                    url=f"historical-price-full/{ticker_str}", 
+                    prefix="historical.item")
+                return items if items is None \
+                    else self.__historical_frame(items, ticker_str, dtype)
+            res = self._get_data(url=f"historical-price-full/{ticker_str}", 
+                cache=cache)
+            date_format = "%Y-%m-%d"
         elif freq in chart_freqs:
-            res = self._get_data(url=f"historical-chart/{freq}/{ticker_str}/")
-            if isinstance(res, Dict):
-                if 'historicalStockList' in res.keys():
-                    ls = []
-                    for data in res.get("historicalStockList"):
-                        symbol = data.get("symbol")
-                        val = pd.concat((pd.Series(d).to_frame().T for d in res.get("historical")))
-                        val.index = pd.MultiIndex.from_tuples([(symbol, date) for date in val.date])
-                        ls.append(val)
-                    df = pd.concat(ls)
-                    return df
-                else:
-                    symbol = res.get("symbol")
-                    val = pd.concat((pd.Series(d).to_frame().T for d in data.get("historical")))
-                    val.index = pd.MultiIndex.from_tuples([(symbol, date) for date in val.date])
-                    df = val
-                    return df
-            else:
-                return res
+            res = self._get_data(url=f"historical-chart/{freq}/{ticker_str}/", 
+                cache=cache)
+            date_format = INTRADAY_FORMAT
         else:
             raise ValueError("frequency specified not supported!")
 
+        # normalise every response shape to (symbol, bars) pairs
+        if isinstance(res, Dict) and 'historicalStockList' in res.keys():
+            series = [(data.get("symbol"), data.get("historical")) 
+                for data in res.get("historicalStockList")]
+        elif isinstance(res, Dict) and 'historical' in res.keys():
+            series = [(res.get("symbol"), res.get("historical"))]
+        elif isinstance(res, List): # chart endpoints return the bars directly
+            series = [(ticker_str, res)]
+        else:
+            return res
+        if not series: return pd.DataFrame()
+        ls = [self.__historical_frame(historical, symbol, dtype, 
+            date_format=date_format) for symbol, historical in series]
+        return pd.concat(ls) if len(ls) > 1 else ls[0]
+
     def _get_historical_fx(self,
         ticker: Union[str, Sequence[str]],
         max_workers: int=8,
-        freq: str="d"):
+        freq: str="d",
+        dtype: Optional[str]=None,
+        cache: bool=False):
         """get the historical fx rate
         :param ticker: takes list or str. must be in the `self.available_tickers_ ` list
         :max_workers: number of workers for multithreaded process
@@ -149,28 +193,19 @@ class ForEx(AbstractAPI):
             - "d", "daily", "day" - daily frequency
             - "Xmin" for X in [1, 5, 15, 30]
             - "Xhour" for X in [1, 4]
+        :param dtype: narrower float dtype for the price columns, e.g. 'float32'
+        :param cache: reuse responses of identical earlier requests
         """
         if isinstance(ticker, str):
-            return self.__get_historical_fx(ticker, freq)
+            return self.__get_historical_fx(ticker, freq, dtype, cache)
         elif isinstance(ticker, Sequence):
             if len(ticker) <= MAX_INPUT_LEN:
-                return self.__get_historical_fx(ticker, freq)
+                return self.__get_historical_fx(ticker, freq, dtype, cache)
             else:
-                with ThreadPoolExecutor(max_workers=max_workers) as executor:
-                    max_len = max_workers * MAX_INPUT_LEN
-                    ls = []
-                    if len(ticker) <= max_len:
-                        futures = [executor.submit(self.__get_historical_fx, c, freq) for c in iter_by_chunk(ticker, MAX_INPUT_LEN)]
-                        for future in as_completed(futures):
-                            ls.append(future.result())
-                    else:
-                        for chunk in iter_by_chunk(ticker, max_len):
-                            futures = [executor.submit(self.__get_historical_fx, c, freq) for c in iter_by_chunk(chunk, MAX_INPUT_LEN)]
-                            for future in as_completed(futures):
-                                ls.append(future.result())
-                    res = pd.concat(ls)
-                    return res
-                        
+                ls = self._gather(self.__get_historical_fx, 
+                    iter_by_chunk(ticker, MAX_INPUT_LEN), 
+                    max_workers=max_workers, freq=freq, dtype=dtype, cache=cache)
+                return pd.concat(ls, copy=False)
         else:
             raise TypeError("only sequence of strings or str accepted for `ticker`")
 
@@ -179,6 +214,17 @@ class ForEx(AbstractAPI):
         ticker: Union[str, Sequence[str]],
         max_worker: int=8,
         config: Union[str, Callable, Config]=DEFAULT_CONFIG,
-        freq: str="d"):
-        return cls(config=config)._get_historical_fx(ticker, max_worker, freq)
+        freq: str="d",
+        dtype: Optional[str]=None,
+        use_arrow: bool=False,
+        cache: bool=False):
+        """classmethod version of _get_historical_fx
+        :param dtype: opt-in narrower float dtype, e.g. 'float32', to halve 
+            the memory of large frames
+        :param use_arrow: return pd.ArrowDtype columns, see `ForEx.__init__`
+        :param cache: reuse responses of identical earlier requests, also 
+            those made by earlier calls
+        """
+        return cls(config=config, use_arrow=use_arrow)._get_historical_fx(
+            ticker, max_worker, freq, dtype, cache)
     
@@ -1,10 +1,8 @@
 """constructing a networkx.Graph object from the API"""
-from typing import Union, Any, Optional, List, Dict, Tuple, Callable
+from typing import Union, Optional, List
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import networkx as nx
-import numpy as np
 import pandas as pd
-import json
 from .tickers import Ticker
 from .indices import Index
 from .utils.utils import iter_by_chunk
@@ -1,15 +1,10 @@
 from __future__ import annotations
-from doctest import DocFileCase
-from urllib.parse import urljoin
-from copy import deepcopy
 import pandas as pd
-from typing import Optional, Union, List, Dict, Callable
-from collections import deque
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Optional, Union
 import datetime as dt
+from pathlib import Path
 from ._abstract import AbstractAPI
 from .utils.config import Config
-from .utils.utils import pandas_strptime
 
 
 DEFAULT_CONFIG = "./FinancialModelingPrep/.config/config.json"
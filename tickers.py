@@ -1,32 +1,42 @@
 from __future__ import annotations
-from urllib.parse import urljoin
-from copy import deepcopy
 import pandas as pd
 from typing import (Optional, Union, List, Dict, Callable, Sequence)
-from collections import deque
 import warnings
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import (ThreadPoolExecutor, wait, FIRST_COMPLETED)
 import datetime as dt
+import time
+import inspect
+import threading
+from copy import deepcopy
+import logging
 from argparse import ArgumentParser
 from pathlib import Path
-import math
-from ._abstract import AbstractAPI
+from urllib.parse import quote
+from functools import cached_property, wraps
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError: # optional, only needed for save_to_parquet and use_arrow
+    pa = None
+from ._abstract import AbstractAPI, AVAILABLE_TICKERS_TTL
 from .utils.config import Config
-from .utils.utils import pandas_strptime, iter_by_chunk
+from .utils.utils import iter_by_chunk
 
 
 DEFAULT_CONFIG = "./FinancialModelingPrep/.config/config.json"
-QUARTER_END = {
-    1: (3, 31), 
-    2: (6, 30),
-    3: (9, 30),
-    4: (12, 31)
-    }
+QUARTER_END = (None, # indexed by quarter, year is replaced on use
+    dt.date(1, 3, 31), 
+    dt.date(1, 6, 30),
+    dt.date(1, 9, 30),
+    dt.date(1, 12, 31),
+    )
 TODAY = dt.datetime.today()
 NOW = dt.datetime.now()
 CUR_YEAR = TODAY.year
 LAST_Q = (TODAY - dt.timedelta(days=90)).month // 3
 DEFAULT_START_DATE = dt.date(2020, 1, 1)
+MEMO_TTL = 24 * 3600 # seconds the classmethod results are memoized for
+_FREQ_PARAMS = dict(A=dict(), Q=dict(period='quarter')) # extra query params
 
 config_p = Path(DEFAULT_CONFIG)
 if not config_p.exists():
@@ -35,85 +45,258 @@ if not config_p.exists():
     a=input("the config file wasn't found - enter your apikey: "))
     )
 
+def _records_to_wide(records: List[Dict], keys: List[str],
+    date_formats: Optional[Dict[str, str]]=None) -> pd.DataFrame:
+    """reshapes API records into one row per (cik, symbol, field), with the 
+    remaining keys as column levels. Each company's block is a plain 
+    transpose of its records, so nothing is stacked
+    :param keys: the non-field keys of the records, including cik and symbol
+    :param date_formats: {key: strptime format} of keys parsed as datetimes
+    """
+    df = pd.DataFrame.from_records(records)
+    for key, fmt in (date_formats or dict()).items():
+        df[key] = pd.to_datetime(df[key], format=fmt, cache=True)
+    fields = df.columns.drop(keys)
+    col_keys = [k for k in keys if k not in ('cik', 'symbol')]
+    blocks = {name: pd.DataFrame(group[fields].to_numpy().T, index=fields,
+            columns=group.set_index(col_keys).index)
+        for name, group in df.groupby(['cik', 'symbol'], sort=False, 
+            dropna=False)}
+    if len(blocks) == 1: # single company, skip the copy made by concat
+        (cik, symbol), block = next(iter(blocks.items()))
+        block.index = pd.MultiIndex.from_product([[cik], [symbol], fields],
+            names=['cik', 'symbol', None])
+        return block
+    return pd.concat(blocks, names=['cik', 'symbol', None])
+
+def _freq_params(freq: str) -> Dict[str, str]:
+    """query params for the 'A'/'Q' freq argument. Don't mutate the result"""
+    try:
+        return _FREQ_PARAMS[freq]
+    except KeyError:
+        raise NotImplementedError(
+            f"freq must be one of {list(_FREQ_PARAMS)}, got {freq!r}") from None
+
+def _records_to_parquet(records: List[Dict], path: Union[str, Path]):
+    """writes API records to a parquet file via arrow, without pandas"""
+    if pa is None:
+        raise ImportError("save_to_parquet requires pyarrow to be installed")
+    pq.write_table(pa.Table.from_pylist(records), path)
+
+def _memoize(func: Optional[Callable]=None, *, 
+    ttl: int=MEMO_TTL, skip: Optional[Callable[[Dict], bool]]=None,
+    maxsize: int=256) -> Callable:
+    """memo for the classmethod entry points. Only dataframes and lists are 
+    kept, so failed requests (None or an error dict) are retried on the next 
+    call. Results are copied on the way out so callers can't alter the cached 
+    ones. Refresh with e.g. Ticker.get_peers.cache_clear()
+    :param ttl: seconds a result is reused for, as the _get_data_ttl default
+    :param skip: called with the bound arguments (defaults applied), calls 
+        for which it returns True always go to the API, e.g. current quarter
+    :param maxsize: results kept, the oldest are dropped first
+    """
+    if func is None:
+        return lambda f: _memoize(f, ttl=ttl, skip=skip, maxsize=maxsize)
+    signature = inspect.signature(func)
+    results, lock = dict(), threading.Lock() # (cls, bucket, args) -> result
+
+    @wraps(func)
+    def wrapper(cls, *args, **kwargs):
+        if skip is not None:
+            bound = signature.bind(cls, *args, **kwargs)
+            bound.apply_defaults()
+            if skip(bound.arguments): return func(cls, *args, **kwargs)
+        # results expire with the time bucket they were cached in
+        bucket = int(time.time() // ttl)
+        try:
+            key = (cls, bucket, 
+                tuple(tuple(a) if isinstance(a, list) else a for a in args),
+                frozenset((k, tuple(v) if isinstance(v, list) else v) 
+                    for k, v in kwargs.items()))
+            with lock: res = results.get(key)
+        except TypeError: # unhashable argument, e.g. a dict config
+            return func(cls, *args, **kwargs)
+        if res is None:
+            res = func(cls, *args, **kwargs)
+            if not isinstance(res, (pd.DataFrame, list)):
+                return res
+            with lock:
+                for k in [k for k in results if k[1] != bucket]:
+                    del results[k]
+                results[key] = res
+                while len(results) > maxsize:
+                    del results[next(iter(results))]
+        return res.copy() if isinstance(res, pd.DataFrame) \
+            else deepcopy(res)
+    wrapper.cache_clear = results.clear
+    return wrapper
+
 class Ticker(AbstractAPI):
+    _available_cache = dict() # (mode, apikey) -> (expiry, available, set)
+    _STATEMENT_ENDPOINTS = dict(income='income-statement/', 
+        balance_sheet='balance-sheet-statement/',
+        cashflow='cash-flow-statement/')
 
     def __init__(self, 
         ticker: Optional[Union[str, List[str]]]=None, 
         config: Union[str, Callable, Config]=DEFAULT_CONFIG, 
         mode: str='statements',
         ignore_unavailable_tickers: bool=False,
+        skip_validation: bool=False,
+        use_arrow: bool=False,
         **kwargs):
+        """
+        :param skip_validation: trust the given tickers and don't fetch the 
+            list of available tickers at all. For bulk jobs
+        :param use_arrow: build flat frames (profiles, executives, ratios) 
+            through pyarrow with pd.ArrowDtype columns. Requires pyarrow and 
+            pandas>=2.0
+        """
         super(Ticker, self).__init__(config=config,
             **kwargs)
-        self.available_tickers = self._get_available_tickers(mode=mode)
+        if use_arrow and pa is None:
+            raise ImportError("pyarrow must be installed to use `use_arrow`")
+        self.use_arrow = use_arrow
+        key = (mode, self.apikey)
+        if skip_validation:
+            self.available_tickers, self._available_upper = None, frozenset()
+            ignore_unavailable_tickers = True
+        else:
+            if Ticker._available_cache.get(key, (0,))[0] < time.time():
+                available = self._get_available_tickers(mode=mode)
+                symbols = available['symbol'] \
+                    if isinstance(available, pd.DataFrame) else available
+                Ticker._available_cache[key] = (
+                    time.time() + AVAILABLE_TICKERS_TTL, available, 
+                    frozenset(str(t).upper().strip() for t in symbols))
+            _, self.available_tickers, self._available_upper = \
+                Ticker._available_cache[key]
         if isinstance(ticker, str):
-            if "," in ticker: 
-                tickers = ticker.upper().split(",")
-                tickers = [t.strip() for t in tickers]
-                if not ignore_unavailable_tickers:
-                    assert len(tickers) == sum([t in self.available_tickers 
-                        for t in tickers]), \
-                        f"All tickers must be available! These are not valid tickers: {' '.join([t for t in tickers if t not in self.available_tickers])}"
-                self.tickers = tickers
-            else:
-                if not ignore_unavailable_tickers:
-                    assert ticker.upper().strip() in [t.upper() for t in self.available_tickers], "Not a valid ticker!"
-                self.tickers = [ticker.upper()]
+            tickers = [t.upper().strip() for t in ticker.split(",")]
         elif isinstance(ticker, list):
-            if not ignore_unavailable_tickers:
-                assert len(ticker) == sum([str(t).upper().strip() in self.available_tickers 
-                        for t in ticker]), \
-                        f"All tickers must be available! These are not valid tickers: {' '.join([t for t in ticker if t not in self.available_tickers])}"
-            self.tickers = [str(t).upper() for t in ticker]
+            tickers = [str(t).upper().strip() for t in ticker]
         elif ticker is None: # special instantiation without ticker only allowed for using the all_company_profiles class method
             self.classmethod_mode = True
-            self.tickers = ""
+            tickers = []
             warnings.warn("Ticker unspecified. Only get_all_company_profiles method will work in this mode")
         else:
             raise TypeError("ticker must be a string or a list of strings")
-        self.tickers_str = ",".join(self.tickers)
+        if not ignore_unavailable_tickers:
+            bad = [t for t in tickers if t not in self._available_upper]
+            if bad:
+                raise ValueError(f"All tickers must be available! These are not valid tickers: {' '.join(bad)}")
+        self.tickers = tickers if ticker is not None else ""
+        self._tickers_tuple = tuple(tickers) # hashable, for cache keys
+
+    @classmethod
+    def clear_cache(cls):
+        """also drops the cached validation sets and the memoized 
+        classmethods, see AbstractAPI.clear_cache"""
+        super(Ticker, cls).clear_cache()
+        Ticker._available_cache.clear()
+        for attr in vars(Ticker).values():
+            func = getattr(attr, '__func__', None)
+            if hasattr(func, 'cache_clear'): func.cache_clear()
+
+    @cached_property
+    def tickers_str(self) -> str:
+        """comma separated tickers, as taken by the multi-ticker endpoints"""
+        return ",".join(self.tickers)
+
+    @cached_property
+    def _tickers_path(self) -> str:
+        """tickers_str escaped for use in a url path, e.g. ^GSPC"""
+        return quote(self.tickers_str, safe=',')
+
+    def _records_to_frame(self, records: List[Dict], 
+        index_cols: Optional[Union[str, List[str]]]=None,
+        date_formats: Optional[Dict[str, str]]=None) -> pd.DataFrame:
+        """flat frame of API records, arrow backed if use_arrow is set
+        :param index_cols: columns to set as the index
+        :param date_formats: {column: strptime format} of columns parsed as 
+            datetimes
+        """
+        if self.use_arrow:
+            df = pa.Table.from_pylist(records)\
+                .to_pandas(types_mapper=pd.ArrowDtype)
+        else:
+            df = pd.DataFrame.from_records(records)
+        for col, fmt in (date_formats or dict()).items():
+            df[col] = pd.to_datetime(df[col], format=fmt, cache=True)
+        return df.set_index(index_cols) if index_cols else df
+
+    def _save_to_sql(self, df: pd.DataFrame, suffix: str, **kwargs):
+        """replaces the table named after the tickers and suffix with df
+        :param kwargs: passed to pandas_to_sql
+        """
+        assert self.sql_conn is not None, "sql_path must be specified if you want to use 'save_to_sql'"
+        tablename = f"{'_'.join(self.tickers)}_{suffix}"
+        self.pandas_to_sql(df, tablename, if_exists="replace", **kwargs)
+
+    def _get_data_per_ticker(self, url: str, in_path: bool=False, 
+        flatten: bool=True, max_workers: int=8, 
+        **kwargs) -> Union[List, Dict, None]:
+        """one request per ticker, run concurrently. For endpoints that only 
+        answer for the first of several comma separated symbols
+        :param in_path: the ticker is appended to url instead of being sent 
+            as the symbol parameter
+        :param flatten: concatenate list responses in ticker order. Otherwise 
+            returns {ticker: response}
+        :return: the plain response if there is only one ticker. When 
+            flattened, None if no ticker returned any records. Tickers whose 
+            request failed are left out with a warning
+        """
+        def get(ticker: str):
+            if in_path:
+                return self._get_data(url=f"{url}{quote(ticker, safe=',')}", 
+                    **kwargs)
+            return self._get_data(url=url, ticker=ticker, **kwargs)
+        if len(self.tickers) == 1:
+            res = get(self.tickers[0])
+            return None if flatten and isinstance(res, list) and not res \
+                else res
+        res = self._gather(get, self.tickers, max_workers=max_workers)
+        failed = [t for t, page in zip(self.tickers, res) 
+            if not isinstance(page, list)]
+        if failed:
+            logging.warning(f"{url}: no data for {' '.join(failed)}")
+            warnings.warn(f"{url}: the requests for {' '.join(failed)} "
+                "failed, they are missing from the result")
+        if not flatten:
+            return dict(zip(self.tickers, res))
+        records = [r for page in res if isinstance(page, list) for r in page]
+        return records if records else None
 
     def __get_statements(self, statement: str='income', 
         freq: str="A", 
         save_to_sql: bool=False, 
-        limit: int=100) -> Optional[pd.DataFrame]:
+        limit: int=100,
+        save_to_parquet: Optional[Union[str, Path]]=None
+        ) -> Optional[pd.DataFrame]:
         """interface for getting income/balance sheet/cash flow statements
         :param statement: takes 'income', 'balance_sheet', 'cashflow'
         :param freq: takes 'A' or 'Q'
+        :param save_to_parquet: path to also write the raw records to as 
+            parquet. Requires pyarrow
         """
-        params = deepcopy(self._default_params)
-        params.update(dict(limit=limit))
-        endpoints = dict(income='income-statement/', 
-            balance_sheet='balance-sheet-statement/',
-            cashflow='cash-flow-statement/')
-        if freq == "A":
-            res = self._get_data(url=urljoin(endpoints.get(statement),
-                f"{','.join(self.tickers)}/"),
-                limit=limit)
-        elif freq == 'Q':
-            res = self._get_data(url=urljoin(endpoints.get(statement),
-                f"{','.join(self.tickers)}/"),
-                period='quarter', limit=limit)
-        else:
-            raise NotImplementedError
+        if statement not in self._STATEMENT_ENDPOINTS:
+            raise NotImplementedError(f"statement must be one of "
+                f"{list(self._STATEMENT_ENDPOINTS)}, got {statement!r}")
+        url = self._STATEMENT_ENDPOINTS[statement]
+        res = self._get_data_per_ticker(url=url, in_path=True, limit=limit, 
+            **_freq_params(freq))
         if isinstance(res, list):
-            ls = []
-            for entry in res:
-                s = pd.Series(entry)
-                ls.append(s.to_frame().T)
-            df = pd.concat(ls).T
-            df = df.T.set_index(['date', 'symbol', 'reportedCurrency', 'cik', 
-                'fillingDate', 'acceptedDate', 'calendarYear', 'period']).T
-            df = df.stack(['symbol', 'cik']).swaplevel(0, 2)
-            if save_to_sql:
-                assert self.sql_conn is not None, "sql_path must be specified if you want to use 'save_to_sql'"
-                start = f"{df.columns.get_level_values('calendarYear')[0]}\
-                    {df.columns.get_level_values('period')[0]}"
-                end = f"{df.columns.get_level_values('calendarYear')[-1]}\
-                    {df.columns.get_level_values('period')[-1]}"
-                tablename = f"{'_'.join(self.ticker)}_{statement}_{freq}_{start}_{end}"
-                df.to_sql(tablename, 
-                    self._cur, if_exists="replace")
+            if save_to_parquet: _records_to_parquet(res, save_to_parquet)
+            df = _records_to_wide(res, ['date', 'symbol', 'reportedCurrency', 
+                'cik', 'fillingDate', 'acceptedDate', 'calendarYear', 'period'],
+                date_formats=dict(date="%Y-%m-%d", fillingDate="%Y-%m-%d",
+                    acceptedDate="%Y-%m-%d %H:%M:%S"))
+            if save_to_sql: # long format, sql can't take the column levels
+                records = pd.DataFrame.from_records(res)
+                years = records['calendarYear']
+                self._save_to_sql(records, 
+                    f"{statement}_{freq}_{years.min()}_{years.max()}", 
+                    index=False)
             return df
         else:
             raise TypeError("value returned from API is not a list")
@@ -121,12 +304,16 @@ class Ticker(AbstractAPI):
     def income_statements(self, 
         freq: int="A", 
         save_to_sql: bool=False, 
-        limit: int=100) -> Optional[pd.DataFrame]:
+        limit: int=100,
+        save_to_parquet: Optional[Union[str, Path]]=None
+        ) -> Optional[pd.DataFrame]:
         """get income statement
         :param freq: takes 'A' or 'Q'
+        :param save_to_parquet: path to also write the raw records to
         """
         return self.__get_statements(statement='income', 
-            freq=freq, save_to_sql=save_to_sql, limit=limit)
+            freq=freq, save_to_sql=save_to_sql, limit=limit, 
+            save_to_parquet=save_to_parquet)
 
     @classmethod
     def get_income_statements(cls, 
@@ -142,12 +329,16 @@ class Ticker(AbstractAPI):
     def balance_sheet(self, 
         freq: str="A", 
         save_to_sql: bool=False, 
-        limit: int=100) -> Optional[pd.DataFrame]:
+        limit: int=100,
+        save_to_parquet: Optional[Union[str, Path]]=None
+        ) -> Optional[pd.DataFrame]:
         """get balance sheet statement
         :param freq: takes 'A' or 'Q'
+        :param save_to_parquet: path to also write the raw records to
         """
         return self.__get_statements(statement='balance_sheet', 
-            freq=freq, save_to_sql=save_to_sql, limit=limit)
+            freq=freq, save_to_sql=save_to_sql, limit=limit, 
+            save_to_parquet=save_to_parquet)
 
     @classmethod
     def get_balance_sheet(cls,
@@ -163,12 +354,16 @@ class Ticker(AbstractAPI):
     def cashflow(self, 
         freq="A", 
         save_to_sql: bool=False,
-        limit: int=100) -> Optional[pd.DataFrame]:
+        limit: int=100,
+        save_to_parquet: Optional[Union[str, Path]]=None
+        ) -> Optional[pd.DataFrame]:
         """get cash flow statement
         :param freq: takes 'A' or 'Q'
+        :param save_to_parquet: path to also write the raw records to
         """
         return self.__get_statements(statement='cashflow', 
-            freq=freq, save_to_sql=save_to_sql, limit=limit)
+            freq=freq, save_to_sql=save_to_sql, limit=limit, 
+            save_to_parquet=save_to_parquet)
     
     @classmethod
     def get_cashflow(cls,
@@ -182,27 +377,13 @@ class Ticker(AbstractAPI):
             .cashflow(freq=freq, limit=limit)
     
     def product_segments(self, freq='A') -> Union[Dict, List]:
-        """get the product segments for the ticker
+        """get the product segments for the ticker. Keyed by ticker if there 
+        are several
         :param freq: takes 'A' or 'Q'
-
-        Note: This temporarily resets the endpoint to v4 and sets it back to 
-        v3 after the function call ends. This may cause issues when using other 
-        functions with this concurrently.
         """
-        # TODO - fix concurrency issue cause by the temporary endpoint reset
-        endpoint = self.endpoint
-        self.endpoint = endpoint.replace("v3", "v4")
         url = "revenue-product-segmentation/"
-        if freq == 'A':
-            d = self._get_data(url=url, ticker=",".join(self.tickers))
-        elif freq == 'Q':
-            d = self._get_data(url=url, ticker=",".join(self.tickers), 
-                period='quarter')
-        else:
-            self.endpoint = endpoint
-            raise NotImplementedError
-        self.endpoint = endpoint # set endpoint back to v3
-        return d
+        return self._get_data_per_ticker(url=url, flatten=False, 
+            api_version='v4', **_freq_params(freq))
 
     @classmethod
     def get_product_segments(cls, ticker: Union[str, List[str]], 
@@ -212,27 +393,13 @@ class Ticker(AbstractAPI):
         return cls(ticker=ticker, config=config).product_segments(freq=freq)
 
     def geo_segments(self, freq='A', **kwargs) -> Union[Dict, List]:
-        """get the geographical segments for the ticker
+        """get the geographical segments for the ticker. Keyed by ticker if 
+        there are several
         :param freq: takes 'A' or 'Q'
-
-        Note: This temporarily resets the endpoint to v4 and sets it back to 
-        v3 after the function call ends. This may cause issues when using other 
-        functions with this concurrently.
         """
-        # TODO - fix concurrency issue cause by the temporary endpoint reset
-        endpoint = self.endpoint
-        self.endpoint = endpoint.replace("v3", "v4")
         url = "revenue-geographic-segmentation/"
-        if freq == 'A':
-            d = self._get_data(url=url, ticker=",".join(self.tickers), **kwargs)
-        elif freq == 'Q':
-            d = self._get_data(url=url, ticker=",".join(self.tickers), 
-                period='quarter', **kwargs)
-        else:
-            self.endpoint = endpoint
-            raise NotImplementedError
-        self.endpoint = endpoint # set endpoint back to v3
-        return d
+        return self._get_data_per_ticker(url=url, flatten=False, 
+            api_version='v4', **kwargs, **_freq_params(freq))
 
     @classmethod
     def get_geo_segments(cls, ticker: Union[str, List[str]], 
@@ -248,17 +415,14 @@ class Ticker(AbstractAPI):
         :param quarter: takes 1, 2, 3, 4
         """
         if quarter:
-            url = urljoin("earning_call_transcript/", ",".join(self.tickers))
+            url = f"earning_call_transcript/{self._tickers_path}"
             assert quarter in range(1, 5), "quarter must be between 1 and 4"
             return self._get_data(url=url, year=year, quarter=quarter)
-        endpoint = self.endpoint
-        self.endpoint = endpoint.replace("v3", "v4")
-        url = urljoin("batch_earning_call_transcript/", ",".join(self.tickers))
-        res = self._get_data(url=url, year=year)
-        self.endpoint = endpoint
-        return res
+        url = f"batch_earning_call_transcript/{self._tickers_path}"
+        return self._get_data(url=url, year=year, api_version='v4')
 
     @classmethod
+    @_memoize
     def get_transcripts(cls, ticker: str, 
         year: int, quarter: Optional[int]=None):
         """classmethod version of get_transcripts. Takes the same arguments
@@ -269,36 +433,33 @@ class Ticker(AbstractAPI):
         return cls(ticker, DEFAULT_CONFIG).transcripts(year=year, quarter=quarter)
 
     def inst_ownership(self, incl_cur_q: bool=True, 
-        save_to_sql: bool=False,):
+        save_to_sql: bool=False,
+        save_to_parquet: Optional[Union[str, Path]]=None):
         """get number of shares held by institutional shareholders disclosed 
         through 13F
         :param incl_cur_q: Include current Q or not
+        :param save_to_parquet: path to also write the raw records to as 
+            parquet. Requires pyarrow
         """
-        # TODO - solve concurrency issue caused by the temporary endpoint reset
-        endpoint = self.endpoint
-        self.endpoint = endpoint.replace("v3", "v4")
         url = "institutional-ownership/symbol-ownership"
-        res = self._get_data(url=url, ticker=",".join(self.tickers),
-            includeCurrentQuarter=incl_cur_q)
+        res = self._get_data_per_ticker(url=url,
+            includeCurrentQuarter=incl_cur_q, no_cache=incl_cur_q, 
+            api_version='v4')
         if isinstance(res, list):
-            ls = []
-            for entry in res:
-                s = pd.Series(entry)
-                ls.append(s.to_frame().T)
-            df = pd.concat(ls).T
-            df = df.T.set_index(['date', 'symbol', 'cik',]).T
-            df = df.stack(['symbol', 'cik']).swaplevel(0, 2)
-            if save_to_sql:
-                start = f"{df.columns.get_level_values('date')[0]}"
-                end = f"{df.columns.get_level_values('date')[-1]}"
-                tablename = f"{'_'.join(self.ticker)}_ownership_{start}_{end}"
-                df.to_sql(tablename, 
-                    self._cur, if_exists="replace")
+            if save_to_parquet: _records_to_parquet(res, save_to_parquet)
+            df = _records_to_wide(res, ['date', 'symbol', 'cik'],
+                date_formats=dict(date="%Y-%m-%d"))
+            if save_to_sql: # long format, sql can't take the column levels
+                records = pd.DataFrame.from_records(res)
+                dates = records['date']
+                self._save_to_sql(records, 
+                    f"ownership_{dates.min()}_{dates.max()}", index=False)
             return df
         else:
             raise TypeError("value returned from API is not a list")
 
     @classmethod
+    @_memoize(skip=lambda a: a['incl_cur_q'])
     def get_inst_ownership(cls, ticker: str, incl_cur_q: bool=True):
         """classmethod version of get_ownership"""
         return cls(ticker=ticker, 
@@ -307,64 +468,80 @@ class Ticker(AbstractAPI):
     def inst_owners(self, year: int=CUR_YEAR,
         quarter: int=LAST_Q,
         save_to_sql: bool=False,
-        max_workers: int=8) -> Optional[pd.DataFrame]:
+        max_workers: int=8,
+        stop_after_empty: int=1,
+        page_retries: int=2) -> Optional[pd.DataFrame]:
         """get number of shares held by institutional shareholders disclosed 
         through 13F
         :param incl_cur_q: Include current Q or not
+        :param stop_after_empty: number of consecutive empty pages that mark 
+            the end of the results
+        :param page_retries: extra attempts for a page whose request fails, 
+            on top of the session's own retries. Raises ConnectionError if 
+            it still fails, rather than returning a truncated frame
         """
-        # TODO - solve concurrency issue caused by the temporary endpoint reset
-        endpoint = self.endpoint
-        self.endpoint = endpoint.replace("v3", "v4")
         url = "institutional-ownership/institutional-holders/symbol-ownership-percent"
-        def get_page(page: int=0):
-            month, day = QUARTER_END.get(quarter)
-            date = dt.date(year, month, day).strftime("%Y-%m-%d")
-            res = self._get_data(url=url, ticker=",".join(self.tickers),
-                page=page,
-                date=date)
-            if res: return res
-        page, i = 1, 0
+        date = QUARTER_END[quarter].replace(year=year).isoformat()
+        recent = (year, quarter) >= (CUR_YEAR, LAST_Q) # filings still coming
+        def get_page(page: int=0) -> List:
+            """the page's records, [] only if the API says the page is empty"""
+            for attempt in range(page_retries + 1):
+                if attempt: time.sleep(2 ** attempt)
+                res = self._get_data(url=url, ticker=self.tickers_str,
+                    page=page,
+                    date=date, api_version='v4', no_cache=recent)
+                if isinstance(res, list): return res
+                logging.warning(f"inst_owners: page {page} failed, "
+                    f"attempt {attempt + 1} of {page_retries + 1}")
+            raise ConnectionError(f"inst_owners: page {page} of "
+                f"{self.tickers_str} for {date} failed after "
+                f"{page_retries + 1} attempts")
+        def end_page(empty: set) -> Optional[int]:
+            """first page of the earliest run of stop_after_empty empty pages"""
+            ends = [p for p in empty 
+                if all(p + k in empty for k in range(stop_after_empty))]
+            return min(ends) if ends else None
         res = []
         
         if max_workers > 1:
-            with ThreadPoolExecutor() as executor:
-                while page:
-                    futures = [executor.submit(get_page, p) 
-                        for p in range(i, i + max_workers)]
-                    for future in as_completed(futures):
+            # sliding window: a new page is submitted as soon as one returns, 
+            # until stop_after_empty pages in a row come back empty
+            pages, empty, last_page = {}, set(), None
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                inflight = {executor.submit(get_page, p): p 
+                    for p in range(max_workers)}
+                i = max_workers
+                while inflight:
+                    done, _ = wait(inflight, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        p = inflight.pop(future)
                         page = future.result()
-                        if isinstance(page, list):
-                            res += page
-                    i += max_workers
+                        if page: pages[p] = page
+                        else: empty.add(p)
+                    last_page = end_page(empty)
+                    while last_page is None and len(inflight) < max_workers:
+                        inflight[executor.submit(get_page, i)] = i
+                        i += 1
+            for p in sorted(pages):
+                if last_page is None or p < last_page:
+                    res.extend(pages[p])
         else:
-            while page:
+            i, empty_run = 0, 0
+            while empty_run < stop_after_empty:
                 page = get_page(i)
-                if isinstance(page, list): res += page
+                res.extend(page)
+                empty_run = 0 if page else empty_run + 1
                 i += 1
 
-        if isinstance(res, list):
-            ls = []
-            for entry in res:
-                s = pd.Series(entry)
-                ls.append(s.to_frame().T)
-            df = pd.concat(ls).T
-            df = df.T.set_index(['date', 'symbol', 'cik',]).T
-            # df = df.stack(['symbol', 'cik']).swaplevel(0, 2)
-            return df
-        else:
-            return res
-
-        if save_to_sql:
-            start = f"{df.columns.get_level_values('date')[0]}"
-            end = f"{df.columns.get_level_values('date')[-1]}"
-            tablename = f"{'_'.join(self.ticker)}_ownership_{start}_{end}"
-            df.to_sql(tablename, 
-                self._cur, if_exists="replace")
-            return df
-        else:
-            raise TypeError("value returned from API is not a list")
+        if not res:
+            return pd.DataFrame()
+        df = pd.DataFrame.from_records(res)
+        if save_to_sql: # one row per holder, the wide frame repeats columns
+            self._save_to_sql(df, f"owners_{date}", index=False)
+        return df.set_index(['date', 'symbol', 'cik',]).T
 
     @classmethod
+    @_memoize(skip=lambda a: (a['year'], a['quarter']) >= (CUR_YEAR, LAST_Q))
     def get_inst_owners(cls, ticker: str, year: int=CUR_YEAR, 
         quarter: int=LAST_Q, max_workers: int=8):
         """classmethod version of self.inst_owners()"""
@@ -373,12 +550,9 @@ class Ticker(AbstractAPI):
                 quarter=quarter, max_workers=max_workers)
 
     def __get_v4_info(self, url: str) -> Dict:
-        """template function for getting v4 info"""
-        endpoint = self.endpoint
-        self.endpoint = endpoint.replace("v3", "v4")
-        res = self._get_data(url=url, ticker=",".join(self.tickers))
-        self.endpoint = endpoint
-        return res
+        """template function for getting v4 info. Cached in memory for a day"""
+        return self._get_data_ttl(url=url, ticker=self.tickers_str, 
+            api_version='v4')
 
     def peers(self) -> List[str]:
         """get the stock's peers"""
@@ -387,6 +561,7 @@ class Ticker(AbstractAPI):
         return res
 
     @classmethod
+    @_memoize
     def get_peers(cls, ticker: Union[str, List[str]]) -> List[str]:
         """classmethod version of get_peers"""
         res = cls(ticker=ticker, 
@@ -405,21 +580,26 @@ class Ticker(AbstractAPI):
         """classmethod version of self.core_info()"""
         return cls(ticker=ticker, config=config).core_info()
 
-    def company_profile(self):
-        """get company's profile information"""
-        url = urljoin("profile/", ",".join(self.tickers))
-        res = self._get_data(url=url)
+    def company_profile(self, cache: bool=False):
+        """get company's profile information
+        :param cache: reuse a response up to a day old, see _get_data_ttl. 
+            Off by default as the profile carries live fields such as price 
+            and mktCap
+        """
+        url = f"profile/{self._tickers_path}"
+        res = self._get_data_ttl(url=url) if cache else self._get_data(url=url)
         if isinstance(res, list):
-            df = pd.concat([pd.Series(s).to_frame().T for s in res])
-            df = df.set_index(["symbol"])
+            df = self._records_to_frame(res, ["symbol"])
             return df
         else: return res
 
     @classmethod
-    def get_company_profile(cls, ticker: Union[str, List[str]]) -> Dict[str, float]:
+    @_memoize(skip=lambda a: not a['cache'])
+    def get_company_profile(cls, ticker: Union[str, List[str]], 
+        cache: bool=False) -> Dict[str, float]:
         """classmethod version of get_profile"""
         res = cls(ticker=ticker, 
-            config=DEFAULT_CONFIG).company_profile()
+            config=DEFAULT_CONFIG).company_profile(cache=cache)
         return res
 
     @classmethod
@@ -433,7 +613,8 @@ class Ticker(AbstractAPI):
             set to higher than 1000
         """
         max_len = 1000 # FinancialModelingPrep takes max 1000 tickers at a time
-        available_tickers = cls().available_tickers
+        inst = cls()
+        available_tickers = inst.available_tickers
         if limit <= max_len:
             tickers = ",".join(available_tickers[:limit])
             res = cls(ticker=tickers, 
@@ -441,13 +622,12 @@ class Ticker(AbstractAPI):
                 ignore_unavailable_tickers=True).company_profile()
             
         else:
-            fn = lambda ls: cls(ticker=",".join(ls), 
-                config=DEFAULT_CONFIG,
-                ignore_unavailable_tickers=True).company_profile()
-            with ThreadPoolExecutor(max_workers=max_workers) as executor:
-                futures = [executor.submit(fn, chunk) 
-                for chunk in iter_by_chunk(available_tickers[:limit], max_len)]
-                res = pd.concat([future.result() for future in futures])
+            pages = inst._get_data_many([f"profile/{quote(','.join(chunk), safe=',')}" 
+                for chunk in iter_by_chunk(available_tickers[:limit], max_len)],
+                max_workers=max_workers)
+            res = pd.DataFrame.from_records([s for page in pages 
+                if isinstance(page, list) for s in page])
+            res = res.set_index(["symbol"])
         
         if sql_path:
             cls(ticker=tickers, 
@@ -456,17 +636,53 @@ class Ticker(AbstractAPI):
                 sql_path=sql_path).pandas_to_sql(res, table_name='all_company_profiles')
         return res
 
+    @classmethod
+    def _batch(cls, method: Callable, tickers: List[str], 
+        batch_size: int=100, max_workers: int=8,
+        config: Union[str, Config]=DEFAULT_CONFIG, 
+        **kwargs) -> pd.DataFrame:
+        """calls method concurrently on one instance per batch_size tickers 
+        and concatenates the resulting dataframes
+        :param method: unbound method of Ticker, e.g. Ticker.company_profile
+        :param kwargs: passed to method
+        """
+        insts = [cls(ticker=list(chunk), config=config) 
+            for chunk in iter_by_chunk(tickers, batch_size)]
+        res = cls._gather(method, insts, max_workers=max_workers, **kwargs)
+        dfs = [df for df in res if isinstance(df, pd.DataFrame)]
+        if len(dfs) == 1: return dfs[0]
+        # per-batch RangeIndexes would repeat labels, renumber them instead
+        ignore_index = all(isinstance(df.index, pd.RangeIndex) for df in dfs)
+        return pd.concat(dfs or [pd.DataFrame()], ignore_index=ignore_index)
+
+    @classmethod
+    def batch_profile(cls, tickers: List[str], batch_size: int=100, 
+        max_workers: int=8, cache: bool=False) -> pd.DataFrame:
+        """company_profile for many tickers, batch_size per request. 
+        The profile endpoint takes up to 1000 tickers per request
+        :param cache: passed to company_profile
+        """
+        return cls._batch(cls.company_profile, tickers, 
+            batch_size=batch_size, max_workers=max_workers, cache=cache)
+
+    @classmethod
+    def batch_execs(cls, tickers: List[str], batch_size: int=100, 
+        max_workers: int=8) -> pd.DataFrame:
+        """list_execs for many tickers, batch_size per request"""
+        return cls._batch(cls.list_execs, tickers, 
+            batch_size=batch_size, max_workers=max_workers)
+
     def list_execs(self) -> Union[pd.DataFrame, Dict]:
         """get list of key executives, their positions and bios"""
-        url = urljoin("key-executives/", ",".join(self.tickers))
+        url = f"key-executives/{self._tickers_path}"
         res = self._get_data(url=url)
         if isinstance(res, list):
-            df = pd.concat(pd.Series(d).to_frame().T for d in res)
-            df.index = range(df.shape[0])
+            df = self._records_to_frame(res)
             return df
         else: return res
     
     @classmethod
+    @_memoize
     def get_list_execs(cls, ticker: Union[str, List[str]]):
         """classmethod version of `get_execs`"""
         return cls(ticker=ticker, 
@@ -478,44 +694,42 @@ class Ticker(AbstractAPI):
         :param limit: number of period going back
         :param freq: takes 'A' or 'Q'
         """
-        url = urljoin("ratios/", self.tickers_str)
-        if freq == 'A':
-            res = self._get_data(url=url)
-        elif freq == 'Q':
-            res = self._get_data(url=url, period='quarter')
-        else:
-            raise NotImplementedError
+        url = f"ratios/{self._tickers_path}"
+        res = self._get_data(url=url, limit=limit, **_freq_params(freq))
         if isinstance(res, list):
-            df = pd.concat([pd.Series(d).to_frame().T for d in res])
-            df = pandas_strptime(df, index_name='date', axis=1)
-            df = df.set_index(["symbol", "date", "period"])
+            df = self._records_to_frame(res, ["symbol", "date", "period"],
+                date_formats=dict(date="%Y-%m-%d"))
             return df
         else:
             return res
 
     @classmethod
+    @_memoize
     def get_financial_ratios(cls, ticker: str, 
         limit: int=10, freq: str='A') -> Union[pd.DataFrame, list]:
         """classmethod version of get_financial_ratios"""
         return cls(ticker=ticker, 
             config=DEFAULT_CONFIG).financial_ratios(limit=limit, freq=freq)
 
+    @classmethod
+    def batch_financial_ratios(cls, tickers: List[str], 
+        limit: int=10, freq: str='A',
+        batch_size: int=100, max_workers: int=8) -> pd.DataFrame:
+        """financial_ratios for many tickers, batch_size per request"""
+        return cls._batch(cls.financial_ratios, tickers, 
+            batch_size=batch_size, max_workers=max_workers, 
+            limit=limit, freq=freq)
+
     def key_metrics(self, limit: int=10, 
         freq: int='A') -> Union[pd.DataFrame, Dict]:
         """get the key metrics such as key financial ratios and valuation
         :param limit: going back how many period 
         :param freq: takes 'Q' or 'A'
         """
-        url = urljoin("key-metrics/", self.tickers_str)
-        if freq == 'A':
-            res = self._get_data(url, limimt=limit)
-        elif freq == 'Q':
-            res = self._get_data(url, period='quarter', limit=limit)
-        else:
-            raise NotImplementedError
+        url = f"key-metrics/{self._tickers_path}"
+        res = self._get_data(url, limit=limit, **_freq_params(freq))
         if isinstance(res, list):
-            df = pd.concat([pd.Series(d).to_frame().T for d in res])
-            df = df.set_index(["symbol", "date", "period"])
+            df = self._records_to_frame(res, ["symbol", "date", "period"])
             return df
         else:
             return res
@@ -533,17 +747,11 @@ class Ticker(AbstractAPI):
         :param limit: going back how many period 
         :param freq: takes 'Q' or 'A'
         """
-        url = urljoin("financial-growth/", self.tickers_str)
-        if freq == 'A':
-            res = self._get_data(url, limimt=limit)
-        elif freq == 'Q':
-            res = self._get_data(url, period='quarter', limit=limit)
-        else:
-            raise NotImplementedError
+        url = f"financial-growth/{self._tickers_path}"
+        res = self._get_data(url, limit=limit, **_freq_params(freq))
         if isinstance(res, list):
-            df = pd.concat([pd.Series(d).to_frame().T for d in res])
-            df = pandas_strptime(df, index_name='date', axis=1)
-            df = df.set_index(["symbol", "date", "period"])
+            df = self._records_to_frame(res, ["symbol", "date", "period"],
+                date_formats=dict(date="%Y-%m-%d"))
             return df
         else:
             return res
@@ -557,10 +765,10 @@ class Ticker(AbstractAPI):
     
     def current_price(self):
         """get current quote price"""
-        url = urljoin("quote/", self.tickers_str)
+        url = f"quote/{self._tickers_path}"
         res = self._get_data(url)
         if isinstance(res, list):
-            df = pd.concat([pd.Series(d).to_frame().T for d in res])
+            df = self._records_to_frame(res)
             return df
 
     @classmethod
@@ -586,7 +794,7 @@ class Ticker(AbstractAPI):
         assert isinstance(start_date, str) and isinstance(end_date, str), f"only str and dt.date accepted for start_date and end_date, you entered {type(start_date)} and {type(end_date)}"
         ticker = ticker if ticker else self.tickers_str
         if freq == 'd':
-            url = urljoin(f"historical-price-full/", ticker)
+            url = f"historical-price-full/{quote(ticker, safe=',')}"
             res = self._get_data(url, 
             additional_params={'from': start_date, 
                 "to": end_date})
@@ -594,9 +802,9 @@ class Ticker(AbstractAPI):
                 if isinstance(res, dict):
                     # tickers = res.get('symbol')
                     if "historical" in res.keys():
-                        df = pd.concat([pd.Series(d).to_frame().T for d 
-                            in res.get('historical') if len(d) > 0])
-                        df = df.set_index('date') # FIXME - this will not work with multiple ticker queries
+                        df = self._records_to_frame([d for d 
+                            in res.get('historical') if len(d) > 0], 'date',
+                            date_formats=dict(date="%Y-%m-%d"))
                         return df
                 else: return res
             else:
@@ -607,31 +815,32 @@ class Ticker(AbstractAPI):
                         for r in res:
                             if "historical" in r.keys():
                                 symbol = r.get("symbol")
-                                df = pd.concat([pd.Series(d).to_frame().T for d 
-                                    in r.get('historical') if len(d) > 0])
-                                df = df.set_index('date') # FIXME - this will not work with multiple ticker queries
+                                df = self._records_to_frame([d for d 
+                                    in r.get('historical') if len(d) > 0], 
+                                    'date', date_formats=dict(date="%Y-%m-%d"))
                                 df.columns = pd.MultiIndex.from_tuples([(symbol, c) for c in df.columns])
-                                ls.append(df.T)
-                        res = pd.concat(ls).T
+                                ls.append(df)
+                        res = ls[0] if len(ls) == 1 \
+                            else pd.concat(ls, axis=1)
                     elif "historical" in res.keys():
                         symbol = res.get("symbol")
-                        res = pd.concat([pd.Series(d).to_frame().T for d 
-                                    in res.get('historical') if len(d) > 0])
-                        res = res.set_index("date")
+                        res = self._records_to_frame([d for d 
+                            in res.get('historical') if len(d) > 0], "date",
+                            date_formats=dict(date="%Y-%m-%d"))
                         res.columns = pd.MultiIndex.from_tuples([(symbol, c) for c in res.columns])
                 return res
 
             
         elif freq in ['1hour', '30min', '15min', '5min', '1min']:
-            url = urljoin(f"historical-chart/{freq}/", ticker)
+            url = f"historical-chart/{freq}/{quote(ticker, safe=',')}"
             res = self._get_data(url, 
             additional_params={'from': start_date, 
                 "to": end_date})
-            if isinstance(res, dict):
-                # tickers = res.get('symbol')
-                df = pd.concat([pd.Series(d).to_frame().T 
-                    for d in res.get('historical')])
-                df = df.set_index('date') # FIXME - this will not work with multiple ticker queries
+            if isinstance(res, dict): 
+                res = res.get('historical')
+            if isinstance(res, list): # chart endpoints return the bars directly
+                df = self._records_to_frame(res, 'date', # FIXME - this will not work with multiple ticker queries
+                    date_formats=dict(date="%Y-%m-%d %H:%M:%S"))
                 return df
             else: return res
         else:
@@ -643,18 +852,13 @@ class Ticker(AbstractAPI):
         freq='d',
         max_workers: int=8) -> pd.DataFrame:
         """extension of _historical_price to allow > 5 tickers"""
-        res = []
         if len(self.tickers) >= 5:
-            batch_size = 5 * max_workers
-            for batch in iter_by_chunk(self.tickers, batch_size):
-                with ThreadPoolExecutor(max_workers=max_workers) as executor:
-                    futures = [executor.submit(
-                        self._historical_price, start_date=start_date, 
-                        end_date=end_date, ticker=",".join(chunk), freq=freq)
-                        for chunk in iter_by_chunk(batch, 5)] # FIXME - change to classmethod
-                    for future in as_completed(futures):
-                        res.append(future.result())
-            res = pd.concat([d.T for d in res]).T
+            chunks = [",".join(chunk) for chunk in iter_by_chunk(self.tickers, 5)]
+            res = self._gather(lambda ticker: self._historical_price(
+                    start_date=start_date, end_date=end_date, ticker=ticker, 
+                    freq=freq), 
+                chunks, max_workers=max_workers)
+            res = pd.concat(res, axis=1)
         else:
             res = self._historical_price(start_date, end_date, self.tickers_str, freq)
         return res
@@ -693,10 +897,8 @@ class Ticker(AbstractAPI):
         else:
             res = self._get_data(url=url, tickers=self.tickers, limit=limit)
         if isinstance(res, list):
-            df = pd.concat([pd.Series(d).to_frame().T for d in res])
-            df = pandas_strptime(df, index_name="publishedDate", axis=1, 
-                datetime_format="%Y-%m-%d %H:%M:%S") 
-            df = df.set_index(['symbol', 'publishedDate'])
+            df = self._records_to_frame(res, ['symbol', 'publishedDate'],
+                date_formats=dict(publishedDate="%Y-%m-%d %H:%M:%S"))
             return df
 
     @classmethod
@@ -713,11 +915,10 @@ class Ticker(AbstractAPI):
 
     def earnings_surprises(self) -> Optional[pd.DataFrame]:
         """get earnings surprise data"""
-        res = self._get_data(url=f'earnings-surprises/{self.tickers_str}')
+        res = self._get_data(url=f'earnings-surprises/{self._tickers_path}')
         if isinstance(res, list):
-            df = pd.concat([pd.Series(d).to_frame().T for d in res])
-            df = pandas_strptime(df, axis=1, index_name="date")
-            df = df.set_index("date")
+            df = self._records_to_frame(res, "date", 
+                date_formats=dict(date="%Y-%m-%d"))
             df.loc[:, "delta"] = df.actualEarningResult / df.estimatedEarning - 1
             # 
             return df
@@ -0,0 +1,55 @@
+from __future__ import annotations
+import hashlib
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+
+class FileCache:
+    """on-disk cache of raw response bodies, one file per (url, params)"""
+    def __init__(self, cache_dir: str, ttl: int=90 * 24 * 3600):
+        """
+        :param cache_dir: directory to keep the cached responses in
+        :param ttl: seconds before a cached response is considered stale
+        """
+        self.cache_dir = Path(cache_dir)
+        self.ttl = ttl
+
+    def _path(self, url: str, params: Dict) -> Path:
+        key = url + repr(sorted(params.items()))
+        digest = hashlib.md5(key.encode('utf-8')).hexdigest()
+        endpoint = url.split('/api/', 1)[-1].strip('/').replace('/', '_')
+        return self.cache_dir / (endpoint or '_') / f"{digest}.json"
+
+    def get(self, url: str, params: Dict) -> Optional[bytes]:
+        """returns the cached body, or None if missing or expired"""
+        path = self._path(url, params)
+        try:
+            if time.time() - path.stat().st_mtime > self.ttl:
+                return
+            return path.read_bytes()
+        except OSError:
+            return
+
+    def set(self, url: str, params: Dict, content: bytes):
+        """writes atomically so concurrent readers never see partial files"""
+        path = self._path(url, params)
+        tmp = None
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(content)
+            os.replace(tmp, path)
+        except OSError: # the cache is best effort, e.g. on read-only disks
+            if tmp and os.path.exists(tmp): os.remove(tmp)
+
+    def clear(self):
+        """removes every cached response under cache_dir"""
+        for path in self.cache_dir.glob('*/*.json'):
+            try:
+                path.unlink()
+            except OSError:
+                pass
@@ -1,6 +1,6 @@
 from __future__ import annotations
 from types import SimpleNamespace
-from typing import Tuple, Any, Dict, List, Optional, Union
+from typing import Any, Dict, Optional, Union
 
 class Config(SimpleNamespace):
     def __init__(self, d: Optional[Dict]=None, **kwargs):
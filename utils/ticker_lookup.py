@@ -1,19 +1,8 @@
 from __future__ import annotations
-from typing import (Union, 
-  Optional,
-  List,
-  Dict,
-  Sequence,
-  Iterable,
-  Callable
-  )
-from collections import Counter
-import json
-from urllib.parse import urlparse, urljoin
+from typing import Union
 from pathlib import Path
 import logging
 import pandas as pd
-import numpy as np
 from .._abstract import AbstractAPI
 
 
@@ -344,7 +333,7 @@ class TickerLookup(AbstractAPI):
         super(TickerLookup, self).__init__(
             config=config,
             **kwargs)
-        endpoint = urljoin(self._endpoint, "stock/list/")
+        endpoint = f"{self._endpoint}stock/list/"
         all_tickers_ls = self._get_data(url=endpoint)
         self.all_tickers = pd.concat(
             [pd.Series(s).to_frame().T 
@@ -1,12 +1,6 @@
 import datetime as dt 
 import pandas as pd
-import numpy as np
-from typing import Union, Optional, Any, Dict, List
-from copy import deepcopy
-import networkx as nx
-from pathlib import Path
-from .._abstract import AbstractAPI
-from .config import Config
+from typing import Union, Optional, Any, List
 import itertools
 
 DEFAULT_CONFIG = "./FinancialModelingPrep/.config/config.json"
@@ -23,7 +17,7 @@ def pandas_strptime(df: pd.DataFrame,
     :param index_iloc: positional index of the row/column to be processed
     :param axis: takes either 0/1, or 'index'/'columns'
     :param datetime_format: datetime.strptime format
-    :param inplace: False by default, will create a deepcopy of the original 
+    :param inplace: False by default, will create a copy of the original 
         frame. Otherwise will changed the original frame inplace
     """
     assert index_name or index_iloc, 'index_name and index_iloc cannot be both unspecified'
@@ -65,7 +59,7 @@ def pandas_strptime(df: pd.DataFrame,
         return df
 
     else:
-        newdf = deepcopy(df)
+        newdf = df.copy()
         if index_name:
             if isinstance(index_name, str):
                 if axis: